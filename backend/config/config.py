@@ -1,7 +1,19 @@
 # Chrome音声文字起こしシステム設定
 
+import os
+from dotenv import load_dotenv
+load_dotenv()
+
 # Whisperモデル設定
 WHISPER_MODEL_SIZE = "medium"  # tiny, base, small, medium, large-v1, large-v2, large-v3
+TRANSCRIPTION_BATCH_SIZE = 8   # 待機中のチャンクをまとめて文字起こしする最大数
+WHISPER_BEAM_SIZE = 1          # ビーム幅（1はgreedy、ストリーミング向けに低遅延）
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")  # cpu, cuda, auto（GPUがあればcuda）
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "auto")  # int8, int8_float32, int8_float16, float16, auto（デバイスに応じて選択）
+WHISPER_CPU_THREADS = max(1, (os.cpu_count() or 2) // 2)  # ワーカーごとのCPUスレッド数
+WHISPER_NUM_WORKERS = 2        # 同時に文字起こしできるワーカー数
+WHISPER_DRAFT_MODEL_SIZE = "small"     # 下書き用の高速モデル（Noneで無効）
+WHISPER_DRAFT_LOGPROB_THRESHOLD = -0.8 # これ未満の区間はWHISPER_MODEL_SIZEで再文字起こし
 
 # 音声バッファ設定
 SAMPLE_RATE = 16000
@@ -9,6 +21,7 @@ SILENCE_THRESHOLD = 0.01    # 無音検出の閾値（低いほど敏感）
 SILENCE_DURATION = 0.7      # 無音検出時間（秒）
 MIN_AUDIO_LEVEL = 0.005     # 最小音声レベル（これ以下は無視）
 MAX_AUDIO_CHUNK_DURATION = 30  # 音声チャンクの最大長（秒）- 10.24秒制限を解除
+VAD_AGGRESSIVENESS = 2      # WebRTC VADの厳しさ（0-3、Noneで音量のみで判定）
 
 # 文字起こし品質設定
 MIN_TEXT_LENGTH = 2         # 最小文字数
@@ -19,20 +32,27 @@ MAX_REPETITION_WORDS = 2    # 同じ単語の最大連続数
 # サーバー設定
 WEBSOCKET_HOST = "localhost"
 WEBSOCKET_PORT = 8766
+WEBSOCKET_SEND_TIMEOUT = 5.0  # クライアントへの送信タイムアウト（秒）
+WEBSOCKET_CLIENT_QUEUE_SIZE = 256  # クライアントごとの送信待ちメッセージ上限（超えると切断）
+WEBSOCKET_MAX_MESSAGE_SIZE = 2**22  # 受信メッセージの最大サイズ（バイト）
+WEBSOCKET_WRITE_LIMIT = 2**20       # 送信バッファの上限（バイト）、超えると送信を待機
+WEBSOCKET_PING_INTERVAL = 10        # 接続確認のping間隔（秒）
+WEBSOCKET_PING_TIMEOUT = 10         # pingの応答待ち時間（秒）
 
 # 文字起こしキュー設定
-MAX_QUEUE_SIZE = 10         # 最大キューサイズ
+MAX_QUEUE_SIZE = 10         # 最大キューサイズ（超えると最も古い未処理の音声を破棄）
 QUEUE_STATUS_UPDATE_INTERVAL = 0.5  # キューステータス更新間隔（秒）
+QUEUE_STATUS_FLUSH_DELAY = 0.02    # この時間内のキューステータス変化をまとめて送信（秒）
+MAX_TRANSCRIPTION_ITEMS = 5000     # 保持する文字起こしの最大件数（超えると古いものから削除）
 
 # デバッグ設定
 DEBUG_MODE = False          # Trueにすると無効な文字起こしのログが表示される
 
 # Gemini AI設定
-import os
-from dotenv import load_dotenv
-load_dotenv()
-
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+SUMMARY_CACHE_DIR = ".summary_cache"      # 要約キャッシュの保存先（Noneで無効）
+SUMMARY_CACHE_TTL = 86400                 # 要約キャッシュの有効期間（秒、Noneで無期限）
+SUMMARY_SEMANTIC_CACHE_THRESHOLD = None   # 類似文字起こしの要約を再利用する類似度（例: 0.85、Noneで無効）
 
 # Notion API設定
 NOTION_TOKEN = os.getenv("NOTION_TOKEN", "")
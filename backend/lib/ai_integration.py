@@ -3,40 +3,29 @@ AI Integration Library
 Handles Gemini AI summarization and processing
 """
 
+import asyncio
+import functools
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import diskcache
+import numpy as np
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 logger = logging.getLogger(__name__)
 
+# Transient Gemini errors that are retried with exponential backoff
+RETRYABLE_GEMINI_ERRORS = (
+    TimeoutError,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
 
-class GeminiSummarizer:
-    """Gemini AI summarization class"""
-    
-    def __init__(self, api_key=None, model_name="gemini-2.0-flash"):
-        self.api_key = api_key
-        self.model_name = model_name
-        
-        if self.api_key:
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel(self.model_name)
-                logger.info("Gemini AI initialized")
-            except Exception as e:
-                logger.error(f"Gemini initialization failed: {e}")
-                self.model = None
-        else:
-            logger.warning("Gemini API key missing")
-            self.model = None
-    
-    async def summarize(self, text, custom_prompt=""):
-        """Summarize text using Gemini AI"""
-        if not self.model:
-            return "AI summarization not available (API key missing)"
-        
-        try:
-            # Default prompt if none provided
-            if not custom_prompt.strip():
-                custom_prompt = """
+# Default summarization instructions (set as the system instruction of the default model)
+DEFAULT_SUMMARY_PROMPT = """
 以下の文字起こしテキストを要約してください。
 
 要約のルール:
@@ -61,16 +50,174 @@ class GeminiSummarizer:
 ## 結論・まとめ
 - 最終的な結論やまとめ
 """
+
+
+class GeminiSummarizer:
+    """Gemini AI summarization class"""
+    
+    def __init__(self, api_key=None, model_name="gemini-2.0-flash",
+                 cache_dir=None, semantic_threshold=None, embedding_model="models/text-embedding-004",
+                 io_workers=4, summary_cache_ttl=86400):
+        """
+        cache_dir: directory of the summary cache (None disables caching)
+        summary_cache_ttl: lifetime of a cached summary in seconds (None keeps it forever)
+        semantic_threshold: cosine similarity for reusing a summary of a similar
+                            transcription (None disables the semantic tier)
+        io_workers: threads for blocking SDK and cache calls
+        """
+        self.api_key = api_key
+        self.model_name = model_name
+        
+        # Summary cache: exact match on disk, similar transcriptions in memory
+        self.summary_cache = diskcache.Cache(cache_dir) if cache_dir else None
+        self.summary_cache_ttl = summary_cache_ttl
+        self.semantic_threshold = semantic_threshold
+        self.embedding_model = embedding_model
+        self._semantic_index = {}  # custom_prompt -> (cache keys, normalized embedding matrix)
+        
+        # Blocking calls run here instead of the shared default executor, so they
+        # never wait behind (or hold up) other work on the server
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="gemini-io")
+        
+        if self.api_key:
+            try:
+                genai.configure(api_key=self.api_key)
+                self.model = genai.GenerativeModel(self.model_name)
+                # The default prompt is below the minimum size for Gemini context
+                # caching, so it is pinned as a system instruction instead
+                self.default_model = genai.GenerativeModel(
+                    self.model_name, system_instruction=DEFAULT_SUMMARY_PROMPT
+                )
+                logger.info("Gemini AI initialized")
+            except Exception as e:
+                logger.error(f"Gemini initialization failed: {e}")
+                self.model = None
+                self.default_model = None
+        else:
+            logger.warning("Gemini API key missing")
+            self.model = None
+            self.default_model = None
+    
+    async def _run_blocking(self, func, *args):
+        """Run a blocking SDK or disk cache call on the I/O threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, func, *args)
+    
+    def _embed(self, text):
+        """Get a normalized embedding vector for text"""
+        result = genai.embed_content(model=self.embedding_model, content=text)
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+    
+    async def _get_cached_summary(self, key, text, custom_prompt):
+        """Look up a cached summary, returning (summary, embedding of text)"""
+        summary = await self._run_blocking(self.summary_cache.get, key)
+        if summary is not None or self.semantic_threshold is None:
+            return summary, None
+        
+        try:
+            embedding = await self._run_blocking(self._embed, text)
+        except Exception as e:
+            logger.warning(f"Embedding failed, semantic cache skipped: {e}")
+            return None, None
+        
+        keys, matrix = self._semantic_index.get(custom_prompt, ([], None))
+        if matrix is not None:
+            scores = matrix @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] > self.semantic_threshold:
+                summary = await self._run_blocking(self.summary_cache.get, keys[best])
+                if summary is not None:
+                    logger.info(f"Semantic summary cache hit (similarity {scores[best]:.3f})")
+        return summary, embedding
+    
+    async def _store_summary(self, key, custom_prompt, summary, embedding):
+        """Store a summary in the cache and index its embedding"""
+        await self._run_blocking(functools.partial(
+            self.summary_cache.set, key, summary, expire=self.summary_cache_ttl
+        ))
+        
+        if embedding is not None:
+            keys, matrix = self._semantic_index.get(custom_prompt, ([], None))
+            matrix = embedding[np.newaxis] if matrix is None else np.vstack([matrix, embedding])
+            self._semantic_index[custom_prompt] = (keys + [key], matrix)
+    
+    @retry(
+        wait=wait_exponential_jitter(initial=1, max=16),
+        stop=stop_after_attempt(4),
+        retry=retry_if_exception_type(RETRYABLE_GEMINI_ERRORS),
+        reraise=True
+    )
+    async def _start_generation(self, model, prompt):
+        """Start a streaming generation, retrying rate limits and unavailability"""
+        return await model.generate_content_async(prompt, stream=True)
+    
+    def _summary_cache_key(self, text, custom_prompt):
+        """Cache key covering everything that determines the summary"""
+        prompt = custom_prompt if custom_prompt.strip() else DEFAULT_SUMMARY_PROMPT
+        # NUL separated so different splits of the same characters never collide
+        material = "\0".join((self.model_name, prompt, text))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    async def summarize_stream(self, text, custom_prompt="", regenerate=False):
+        """
+        Summarize text using Gemini AI, yielding the summary as it is generated
+        
+        regenerate: skip the summary cache lookup and replace the cached summary
+        """
+        if not self.model:
+            yield "AI summarization not available (API key missing)"
+            return
+        
+        key = embedding = None
+        if self.summary_cache is not None:
+            key = self._summary_cache_key(text, custom_prompt)
+            if not regenerate:
+                try:
+                    summary, embedding = await self._get_cached_summary(key, text, custom_prompt)
+                    if summary is not None:
+                        logger.info("Summary served from cache")
+                        yield summary
+                        return
+                except Exception as e:
+                    logger.warning(f"Summary cache lookup failed: {e}")
+        
+        summary_parts = []
+        try:
+            if not custom_prompt.strip():
+                # Default prompt is the model's system instruction, send only the transcription
+                model = self.default_model
+                full_prompt = f"文字起こしテキスト:\n{text}"
+            else:
+                model = self.model
+                full_prompt = f"{custom_prompt}\n\n文字起こしテキスト:\n{text}"
             
-            full_prompt = f"{custom_prompt}\n\n文字起こしテキスト:\n{text}"
-            
-            response = await self.model.generate_content_async(full_prompt)
-            return response.text
+            response = await self._start_generation(model, full_prompt)
+            async for chunk in response:
+                summary_parts.append(chunk.text)
+                yield chunk.text
             
         except Exception as e:
             logger.error(f"Gemini summarization error: {e}")
-            return f"Summarization error: {str(e)}"
+            yield f"Summarization error: {str(e)}"
+            return
+        
+        if key is not None:
+            try:
+                await self._store_summary(key, custom_prompt, "".join(summary_parts), embedding)
+            except Exception as e:
+                logger.warning(f"Summary cache store failed: {e}")
+    
+    async def summarize(self, text, custom_prompt="", regenerate=False):
+        """Summarize text using Gemini AI"""
+        return "".join([chunk async for chunk in self.summarize_stream(text, custom_prompt, regenerate)])
     
     def is_available(self):
         """Check if Gemini AI is available"""
         return self.model is not None
+    
+    async def close(self):
+        """Release the I/O threads and the summary cache"""
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        if self.summary_cache is not None:
+            self.summary_cache.close()
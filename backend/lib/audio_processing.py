@@ -5,66 +5,190 @@ Handles audio buffering, silence detection, and transcription
 
 import numpy as np
 import logging
-from collections import deque
-from faster_whisper import WhisperModel
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import ctranslate2
+import webrtcvad
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 import re
 
 logger = logging.getLogger(__name__)
 
+# faster-whisper always works on 16kHz audio split into 30 second windows
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_CHUNK_DURATION = 30
+
+# Patterns that indicate noise or invalid transcription, combined into one regex
+NOISE_PATTERNS = [
+    r'^[a-zA-Z]$',  # Single letter
+    r'^\d+$',  # Numbers only
+    r'^[!@#$%^&*(),.?":{}|<>]+$',  # Symbols only
+    r'^(あ|い|う|え|お|ん|っ|。|、)+$',  # Japanese single characters
+    r'^(um|uh|ah|oh|mm|hmm)\s*$',  # English filler words
+    r'^(えー|あー|うー|んー|あの|その|まあ)\s*$',  # Japanese filler words
+    r'^\s*$',  # Whitespace only
+]
+NOISE_RE = re.compile("|".join(f"(?:{pattern})" for pattern in NOISE_PATTERNS), re.IGNORECASE)
+
+# Loaded Whisper models shared by all transcribers, keyed by (model_size, device, compute_type)
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()  # Models are first used from executor threads
+
+
+def resolve_device(device="auto", compute_type="auto"):
+    """Resolve "auto" device and compute type for the current host"""
+    if device == "auto":
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    if compute_type == "auto":
+        compute_type = "int8_float16" if device == "cuda" else "int8_float32"
+    return device, compute_type
+
+
+def _get_whisper_model(model_size, device, compute_type, cpu_threads=0, num_workers=1):
+    """Load a Whisper model on first use and reuse it afterwards"""
+    key = (model_size, device, compute_type)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is None:
+            logger.info(f"Loading Whisper model '{model_size}' ({device}, {compute_type})...")
+            model = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
+            )
+            _MODEL_CACHE[key] = model
+            logger.info("Whisper model loading completed")
+    return model
+
 
 class AudioBuffer:
     """Audio data buffering and silence detection class"""
     
+    # Sample rates and frame length supported by WebRTC VAD
+    VAD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+    VAD_FRAME_DURATION = 0.02
+    
     def __init__(self, sample_rate=16000, silence_threshold=0.01, silence_duration=0.7, 
-                 min_audio_level=0.005, max_audio_chunk_duration=30):
+                 min_audio_level=0.005, max_audio_chunk_duration=30, vad_aggressiveness=2):
+        """
+        vad_aggressiveness: WebRTC VAD mode 0-3 (None uses the RMS threshold only)
+        """
         self.sample_rate = sample_rate
         self.silence_threshold = silence_threshold
         self.silence_duration = silence_duration
         self.min_audio_level = min_audio_level
         self.max_audio_chunk_duration = max_audio_chunk_duration
         
-        self.buffer = deque()
         self.silence_frames = int(self.silence_duration * self.sample_rate)
         self.current_silence_count = 0
-        self.audio_chunk = []
         self.min_chunk_length = int(0.5 * self.sample_rate)  # Minimum 0.5 seconds
+        self.max_chunk_length = int(self.sample_rate * self.max_audio_chunk_duration)
+        
+        # Squared thresholds so levels are compared as mean squares, without sqrt
+        self._silence_threshold_sq = self.silence_threshold ** 2
+        self._min_audio_level_sq = self.min_audio_level ** 2
+        
+        # Preallocated sample storage with a write cursor (1 second headroom for the last frame)
+        self._buf = np.empty(self.max_chunk_length + self.sample_rate, dtype=np.float32)
+        self._len = 0
+        self._ss_total = 0.0  # Running sum of squares of buffered samples
+        
+        # WebRTC VAD confirms speech in frames that pass the RMS threshold
+        if vad_aggressiveness is not None and self.sample_rate in self.VAD_SAMPLE_RATES:
+            self.vad = webrtcvad.Vad(vad_aggressiveness)
+        else:
+            self.vad = None
+        self.vad_frame_length = int(self.sample_rate * self.VAD_FRAME_DURATION)
+        
+        # Scratch arrays reused for the PCM conversion of every incoming frame
+        self._vad_scaled = np.empty(0, dtype=np.float32)
+        self._vad_pcm = np.empty(0, dtype=np.int16)
+        
+    def _append(self, audio_data):
+        """Copy samples into the preallocated buffer, growing it if a frame overflows"""
+        n = audio_data.size
+        if self._len + n > self._buf.size:
+            grown = np.empty(max(self._buf.size * 2, self._len + n), dtype=np.float32)
+            grown[:self._len] = self._buf[:self._len]
+            self._buf = grown
+        self._buf[self._len:self._len + n] = audio_data
+        self._len += n
+        
+    def _reset(self):
+        """Discard buffered samples"""
+        self._len = 0
+        self._ss_total = 0.0
+        self.current_silence_count = 0
+        
+    def _take_chunk(self):
+        """Copy the buffered samples out and reuse the buffer"""
+        # A copy sized to the chunk, so a queued chunk does not keep the whole
+        # max-length buffer alive
+        chunk = self._buf[:self._len].copy()
+        self._reset()
+        return chunk
+        
+    def _contains_speech(self, audio_data):
+        """Check whether any 20ms frame of the audio contains speech"""
+        frame_count = audio_data.size // self.vad_frame_length
+        if self.vad is None or frame_count == 0:
+            return True  # Nothing to check, rely on the RMS threshold
+        
+        # WebRTC VAD expects 16-bit PCM, converted in place into the scratch arrays
+        sample_count = frame_count * self.vad_frame_length
+        if self._vad_pcm.size < sample_count:
+            self._vad_scaled = np.empty(sample_count, dtype=np.float32)
+            self._vad_pcm = np.empty(sample_count, dtype=np.int16)
+        scaled = self._vad_scaled[:sample_count]
+        np.clip(audio_data[:sample_count], -1.0, 1.0, out=scaled)
+        scaled *= 32767
+        np.copyto(self._vad_pcm[:sample_count], scaled, casting="unsafe")
+        
+        pcm = memoryview(self._vad_pcm[:sample_count]).cast("B")
+        frame_bytes = self.vad_frame_length * 2
+        for offset in range(0, len(pcm), frame_bytes):
+            if self.vad.is_speech(pcm[offset:offset + frame_bytes], self.sample_rate):
+                return True
+        return False
         
     def add_audio(self, audio_data):
-        """Add audio data and perform silence detection"""
-        # Calculate audio level
-        audio_level = np.sqrt(np.mean(audio_data ** 2))
+        """Add audio data and perform silence detection
+        
+        audio_data may be a view over a network buffer, it is copied and not kept.
+        """
+        audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
         
-        # More strict silence detection
-        if audio_level < self.silence_threshold:
+        if audio_data.size == 0:
+            return None
+        
+        # Calculate audio level as a sum of squares (single dot product)
+        ss = float(np.dot(audio_data, audio_data))
+        
+        # RMS threshold rejects quiet frames cheaply, VAD rejects loud non-speech
+        if (ss < self._silence_threshold_sq * audio_data.size or
+                not self._contains_speech(audio_data)):
             self.current_silence_count += len(audio_data)
         else:
             self.current_silence_count = 0
             
-        self.audio_chunk.extend(audio_data)
+        self._append(audio_data)
+        self._ss_total += ss
         
         # Return audio chunk if silence continues for specified time and meets minimum length
         if (self.current_silence_count >= self.silence_frames and 
-            len(self.audio_chunk) >= self.min_chunk_length):
-            
-            chunk = np.array(self.audio_chunk, dtype=np.float32)
+            self._len >= self.min_chunk_length):
             
-            # Check audio quality
-            chunk_level = np.sqrt(np.mean(chunk ** 2))
-            if chunk_level > self.min_audio_level:  # Audio level above threshold
-                self.audio_chunk = []
-                self.current_silence_count = 0
-                return chunk
-            else:
-                # If audio level is too low, reset and wait for next
-                self.audio_chunk = []
-                self.current_silence_count = 0
+            # Check audio quality from the running sum of squares
+            if self._ss_total > self._min_audio_level_sq * self._len:  # Audio level above threshold
+                return self._take_chunk()
+            # If audio level is too low, discard and wait for next
+            self._reset()
         
         # Force split if chunk is too long (configurable maximum duration)
-        max_chunk_length = self.sample_rate * self.max_audio_chunk_duration
-        if len(self.audio_chunk) > max_chunk_length:
-            chunk = np.array(self.audio_chunk, dtype=np.float32)
-            self.audio_chunk = []
-            self.current_silence_count = 0
+        if self._len > self.max_chunk_length:
+            chunk = self._take_chunk()
             logger.info(f"Audio chunk reached maximum length ({self.max_audio_chunk_duration}s), forced split")
             return chunk
         
@@ -74,20 +198,85 @@ class AudioBuffer:
 class WhisperTranscriber:
     """Transcription class using faster-whisper"""
     
+    # Long chunks are split at quiet points and decoded in parallel
+    PARALLEL_MIN_DURATION = 15   # Seconds of audio before splitting
+    SPLIT_FRAME_DURATION = 0.02  # Energy frame used to find quiet points
+    SPLIT_SEARCH_DURATION = 2.0  # Search window on each side of a split point
+    
     def __init__(self, model_size="medium", min_text_length=2, max_text_length=2000, 
-                 max_repetition_chars=4, max_repetition_words=2):
+                 max_repetition_chars=4, max_repetition_words=2, batch_size=8,
+                 beam_size=1, device="auto", compute_type="auto", cpu_threads=0, num_workers=1,
+                 draft_model_size=None, draft_logprob_threshold=-0.8):
         """
         model_size: tiny, base, small, medium, large-v1, large-v2, large-v3
+        batch_size: number of audio windows decoded together by transcribe_batch
+        beam_size: decoder beam width (1 = greedy decoding)
+        device: cpu, cuda or auto (cuda when a GPU is available)
+        compute_type: int8, int8_float32, int8_float16, float16 or auto (by device)
+        cpu_threads: threads per worker (0 = CTranslate2 default)
+        num_workers: number of transcriptions that can run concurrently
+        draft_model_size: faster model for the first pass (None uses model_size only)
+        draft_logprob_threshold: draft segments below this avg_logprob are
+                                 re-transcribed with model_size
         """
         self.model_size = model_size
         self.min_text_length = min_text_length
         self.max_text_length = max_text_length
         self.max_repetition_chars = max_repetition_chars
         self.max_repetition_words = max_repetition_words
+        self.batch_size = batch_size
+        self.beam_size = beam_size
+        self.device, self.compute_type = resolve_device(device, compute_type)
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.draft_model_size = draft_model_size
+        self.draft_logprob_threshold = draft_logprob_threshold
+        
+        # Model is loaded on first transcription (see the model property)
+        self._batched_model = None
+        
+        # Workers for decoding pieces of long chunks concurrently
+        if num_workers > 1:
+            self._split_pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="whisper-split")
+        else:
+            self._split_pool = None
+        
+    @property
+    def model(self):
+        """Shared Whisper model, loaded on first access"""
+        return _get_whisper_model(
+            self.model_size, self.device, self.compute_type,
+            cpu_threads=self.cpu_threads, num_workers=self.num_workers
+        )
+    
+    @property
+    def draft_model(self):
+        """Shared first-pass model (the main model when no draft model is set)"""
+        if self.draft_model_size is None:
+            return self.model
+        return _get_whisper_model(
+            self.draft_model_size, self.device, self.compute_type,
+            cpu_threads=self.cpu_threads, num_workers=self.num_workers
+        )
+    
+    @property
+    def batched_model(self):
+        """Batched inference pipeline wrapping the first-pass model"""
+        if self._batched_model is None:
+            self._batched_model = BatchedInferencePipeline(model=self.draft_model)
+        return self._batched_model
+        
+    def has_repeated_chars(self, text):
+        """Check whether the same character appears max_repetition_chars times in a row"""
+        run_length = self.max_repetition_chars - 1
+        if run_length < 1 or len(text) <= run_length:
+            return False
         
-        logger.info(f"Loading Whisper model '{model_size}'...")
-        self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
-        logger.info("Whisper model loading completed")
+        # Compare neighbouring code points at once, then look for a run of matches
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        same = (codes[:-1] == codes[1:]).astype(np.int32)
+        runs = np.convolve(same, np.ones(run_length, dtype=np.int32), mode="valid")
+        return bool(runs.max() >= run_length)
         
     def is_valid_transcription(self, text):
         """Check transcription result validity"""
@@ -101,10 +290,8 @@ class WhisperTranscriber:
             return False
         
         # Check for excessive character repetition
-        for i in range(len(text) - self.max_repetition_chars):
-            if text[i] == text[i + 1] == text[i + 2] == text[i + 3]:
-                if self.max_repetition_chars == 4:
-                    return False
+        if self.has_repeated_chars(text):
+            return False
         
         # Check for excessive word repetition
         words = text.split()
@@ -114,40 +301,72 @@ class WhisperTranscriber:
                     return False
         
         # Filter patterns that indicate noise or invalid transcription
-        noise_patterns = [
-            r'^[a-zA-Z]$',  # Single letter
-            r'^\d+$',  # Numbers only
-            r'^[!@#$%^&*(),.?":{}|<>]+$',  # Symbols only
-            r'^(あ|い|う|え|お|ん|っ|。|、)+$',  # Japanese single characters
-            r'^(um|uh|ah|oh|mm|hmm)\s*$',  # English filler words
-            r'^(えー|あー|うー|んー|あの|その|まあ)\s*$',  # Japanese filler words
-            r'^\s*$',  # Whitespace only
-        ]
-        
-        for pattern in noise_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return False
+        if NOISE_RE.match(text):
+            return False
         
         return True
     
+    def _split_on_silence(self, audio_chunk, piece_count):
+        """Split audio into pieces at the quietest frame near each even split point"""
+        frame_length = int(WHISPER_SAMPLE_RATE * self.SPLIT_FRAME_DURATION)
+        frame_count = len(audio_chunk) // frame_length
+        frames = audio_chunk[:frame_count * frame_length].reshape(frame_count, frame_length)
+        energy = np.einsum("ij,ij->i", frames, frames)
+        
+        spacing = frame_count // piece_count
+        search = max(1, min(int(self.SPLIT_SEARCH_DURATION / self.SPLIT_FRAME_DURATION), spacing // 4))
+        
+        bounds = [0]
+        for i in range(1, piece_count):
+            target = i * spacing
+            low, high = max(target - search, 1), min(target + search, frame_count - 1)
+            bounds.append((low + int(np.argmin(energy[low:high]))) * frame_length)
+        bounds.append(len(audio_chunk))
+        
+        return [audio_chunk[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    
+    def _decode(self, model, audio):
+        """Run a model over audio and return its segment generator"""
+        segments, info = model.transcribe(
+            audio,
+            beam_size=self.beam_size,
+            language="ja",
+            task="transcribe",
+            vad_filter=False  # Silence is already gated by AudioBuffer
+        )
+        return segments
+    
+    def _segment_text(self, audio, segment):
+        """Get segment text, re-transcribing uncertain draft segments with the main model"""
+        if self.draft_model_size is None or segment.avg_logprob >= self.draft_logprob_threshold:
+            return segment.text
+        
+        start = int(segment.start * WHISPER_SAMPLE_RATE)
+        end = int(segment.end * WHISPER_SAMPLE_RATE)
+        if end <= start:
+            return segment.text
+        
+        logger.debug(f"Re-transcribing uncertain segment (avg_logprob {segment.avg_logprob:.2f})")
+        return "".join(refined.text for refined in self._decode(self.model, audio[start:end]))
+    
+    def _transcribe_text(self, audio_chunk):
+        """Decode audio to raw text without validation"""
+        segments = self._decode(self.draft_model, audio_chunk)
+        
+        # Combine all segments (decoding happens here, inside the caller's try)
+        return "".join(self._segment_text(audio_chunk, segment) for segment in segments)
+    
     def transcribe(self, audio_chunk):
         """Transcribe audio chunk to text"""
         try:
-            segments, info = self.model.transcribe(
-                audio_chunk,
-                beam_size=5,
-                language="ja",
-                task="transcribe",
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-            
-            # Combine all segments
-            text = ""
-            for segment in segments:
-                text += segment.text
-            
-            text = text.strip()
+            if (self._split_pool is not None and
+                len(audio_chunk) > self.PARALLEL_MIN_DURATION * WHISPER_SAMPLE_RATE):
+                # CTranslate2 releases the GIL, so pieces decode in parallel;
+                # map keeps them in order of their start time
+                pieces = self._split_on_silence(audio_chunk, self.num_workers)
+                text = "".join(self._split_pool.map(self._transcribe_text, pieces)).strip()
+            else:
+                text = self._transcribe_text(audio_chunk).strip()
             
             if self.is_valid_transcription(text):
                 return text
@@ -158,3 +377,61 @@ class WhisperTranscriber:
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return ""
+    
+    def transcribe_batch(self, audio_chunks):
+        """Transcribe several audio chunks with one batched call, returning one text per chunk"""
+        if len(audio_chunks) == 1:
+            return [self.transcribe(audio_chunks[0])]
+        
+        try:
+            # Concatenate chunks and describe each one as a clip (in seconds) so
+            # the pipeline decodes them as a single batch without running VAD
+            offsets = np.cumsum([0] + [len(chunk) for chunk in audio_chunks])
+            max_clip_length = WHISPER_SAMPLE_RATE * WHISPER_CHUNK_DURATION
+            clip_timestamps = []
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                for clip_start in range(start, end, max_clip_length):
+                    clip_end = min(clip_start + max_clip_length, end)
+                    clip_timestamps.append({
+                        "start": clip_start / WHISPER_SAMPLE_RATE,
+                        "end": clip_end / WHISPER_SAMPLE_RATE
+                    })
+            
+            audio = np.concatenate(audio_chunks)
+            segments, info = self.batched_model.transcribe(
+                audio,
+                language="ja",
+                task="transcribe",
+                beam_size=self.beam_size,
+                batch_size=self.batch_size,
+                clip_timestamps=clip_timestamps,
+                vad_filter=False
+            )
+            
+            # Map each segment back to the chunk containing its midpoint
+            parts = [[] for _ in audio_chunks]
+            for segment in segments:
+                midpoint = (segment.start + segment.end) / 2 * WHISPER_SAMPLE_RATE
+                index = int(np.searchsorted(offsets, midpoint, side="right")) - 1
+                index = min(max(index, 0), len(audio_chunks) - 1)
+                parts[index].append(self._segment_text(audio, segment))
+            texts = ["".join(chunk_parts) for chunk_parts in parts]
+            
+        except Exception as e:
+            logger.error(f"Batch transcription error: {e}")
+            return [""] * len(audio_chunks)
+        
+        results = []
+        for text in texts:
+            text = text.strip()
+            if self.is_valid_transcription(text):
+                results.append(text)
+            else:
+                logger.debug(f"Invalid transcription filtered: {text}")
+                results.append("")
+        return results
+    
+    def close(self):
+        """Release the threads used for parallel transcription of long chunks"""
+        if self._split_pool is not None:
+            self._split_pool.shutdown(wait=False, cancel_futures=True)
@@ -4,12 +4,58 @@ Handles Notion API operations and markdown conversion
 """
 
 import logging
-import asyncio
-from notion_client import Client
+import re
+import httpx
 import time
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
 logger = logging.getLogger(__name__)
 
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_API_VERSION = "2022-06-28"
+
+# Notion responses that mean the request was rejected without being processed
+# (rate_limited, service_unavailable). 500/502/504 are not retried: the page may
+# already have been created before the error, and a retry would duplicate it
+RETRYABLE_STATUS_CODES = {429, 503}
+
+# Longest Retry-After honoured before giving up on waiting for Notion (seconds)
+MAX_RETRY_AFTER = 60
+
+# Markdown line classifier: indentation, then heading / bullet / numbered list marker
+_LINE_RE = re.compile(r'^(?P<indent>\s*)(?:(?P<h>#{1,3}) |(?P<b>[-*]) |(?P<n>\d+\.) |)(?P<rest>.*)$')
+
+# Inline formatting: **bold**, *italic* and `code`, matched left to right in one pass
+_RICH_RE = re.compile(r'\*\*(?P<bold>[^*]+)\*\*|\*(?P<italic>[^*]+)\*|`(?P<code>[^`]+)`')
+
+# Notion accepts at most two levels of nested blocks in a single request
+MAX_LIST_DEPTH = 2
+
+
+def _is_retryable_error(error):
+    """Check whether a failed page creation can be retried safely"""
+    # Only retry failures where Notion did not create the page: connection
+    # failures before the request was sent, and explicit rejections. Read timeouts
+    # and gateway errors are not retried since the page may already exist
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    return (isinstance(error, httpx.HTTPStatusError) and
+            error.response.status_code in RETRYABLE_STATUS_CODES)
+
+
+_backoff = wait_exponential_jitter(initial=1, max=16)
+
+
+def _wait_before_retry(retry_state):
+    """Wait as long as Notion's Retry-After header asks, otherwise back off exponentially"""
+    error = retry_state.outcome.exception()
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            return min(float(error.response.headers["Retry-After"]), MAX_RETRY_AFTER)
+        except (KeyError, ValueError):
+            pass
+    return _backoff(retry_state)
+
 
 class NotionClient:
     """Notion API client for page creation and management"""
@@ -19,15 +65,29 @@ class NotionClient:
         self.parent_page_id = parent_page_id
         
         if self.token and self.parent_page_id:
-            self.client = Client(auth=self.token)
+            # One shared async client keeps the HTTP/2 connection alive between saves
+            self._http = httpx.AsyncClient(
+                base_url=NOTION_API_URL,
+                headers={
+                    "Authorization": f"Bearer {self.token}",
+                    "Notion-Version": NOTION_API_VERSION
+                },
+                http2=True,
+                timeout=30.0
+            )
             logger.info("Notion client initialized")
         else:
-            self.client = None
+            self._http = None
             logger.warning("Notion token or parent page ID missing")
     
     def is_available(self):
         """Check if Notion integration is available"""
-        return self.client is not None and self.parent_page_id is not None
+        return self._http is not None and self.parent_page_id is not None
+    
+    async def close(self):
+        """Close the underlying HTTP connection"""
+        if self._http is not None:
+            await self._http.aclose()
     
     async def save_summary(self, summary_text):
         """Save summary to Notion as a new page"""
@@ -43,9 +103,7 @@ class NotionClient:
             # Convert markdown to Notion blocks
             blocks = self._markdown_to_notion_blocks(summary_text, skip_first_heading=True)
             
-            # Create page synchronously in thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, self._create_page, title, blocks)
+            response = await self._create_page(title, blocks)
             
             return {
                 "success": True,
@@ -57,11 +115,17 @@ class NotionClient:
             logger.error(f"Failed to save to Notion: {e}")
             return {"success": False, "message": str(e)}
     
-    def _create_page(self, title, blocks):
-        """Synchronously create Notion page"""
-        return self.client.pages.create(
-            parent={"page_id": self.parent_page_id},
-            properties={
+    @retry(
+        wait=_wait_before_retry,
+        stop=stop_after_attempt(4),
+        retry=retry_if_exception(_is_retryable_error),
+        reraise=True
+    )
+    async def _create_page(self, title, blocks):
+        """Create Notion page, retrying rate limits and unavailability"""
+        response = await self._http.post("/pages", json={
+            "parent": {"page_id": self.parent_page_id},
+            "properties": {
                 "title": {
                     "title": [
                         {
@@ -72,213 +136,110 @@ class NotionClient:
                     ]
                 }
             },
-            children=blocks
-        )
+            "children": blocks
+        })
+        if response.is_error:
+            # Keep Notion's own explanation (e.g. which block failed validation)
+            try:
+                detail = response.json().get("message")
+            except ValueError:
+                detail = None
+            raise httpx.HTTPStatusError(
+                f"Notion API error {response.status_code}: {detail or response.reason_phrase}",
+                request=response.request,
+                response=response
+            )
+        return response.json()
     
     def _markdown_to_notion_blocks(self, markdown_text, skip_first_heading=True):
-        """Convert markdown text to Notion blocks with improved nested list support"""
+        """Convert markdown text to Notion blocks with nested list support"""
         blocks = []
-        lines = markdown_text.split('\n')
+        list_stack = []  # (indent, block) of bullet items that can take children
         first_heading_skipped = False
-        i = 0
         
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line:
-                i += 1
+        for line in markdown_text.split('\n'):
+            if not line.strip():
+                # Empty line, keep any open list so following children still nest
                 continue
             
-            if line.startswith('# '):
+            match = _LINE_RE.match(line.rstrip())
+            content = match.group('rest')
+            
+            if match.group('b'):
+                # Bullet list item, nested under the closest less-indented item
+                indent = len(match.group('indent'))
+                while list_stack and list_stack[-1][0] >= indent:
+                    list_stack.pop()
+                
+                block = self._text_block("bulleted_list_item", content)
+                if list_stack:
+                    parent = list_stack[-1][1]["bulleted_list_item"]
+                    parent.setdefault("children", []).append(block)
+                else:
+                    blocks.append(block)
+                
+                if len(list_stack) + 1 < MAX_LIST_DEPTH:
+                    list_stack.append((indent, block))
+                continue
+            
+            list_stack.clear()
+            
+            if match.group('h'):
+                level = len(match.group('h'))
+                
                 # Skip the first heading if it's used as page title
-                if skip_first_heading and not first_heading_skipped:
+                if level == 1 and skip_first_heading and not first_heading_skipped:
                     first_heading_skipped = True
-                    i += 1
                     continue
                 
-                # Heading 1
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": self._parse_rich_text(line[2:])
-                    }
-                })
-            elif line.startswith('## '):
-                # Heading 2
-                blocks.append({
-                    "object": "block", 
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": self._parse_rich_text(line[3:])
-                    }
-                })
-            elif line.startswith('### '):
-                # Heading 3
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_3", 
-                    "heading_3": {
-                        "rich_text": self._parse_rich_text(line[4:])
-                    }
-                })
-            elif line.startswith('- ') or line.startswith('* '):
-                # Handle bullet list with potential children
-                list_item, next_index = self._parse_list_item_with_children(lines, i)
-                blocks.append(list_item)
-                i = next_index - 1  # -1 because loop will increment
-            elif line.startswith('1. ') or line.startswith('2. ') or line.startswith('3. '):
+                blocks.append(self._text_block(f"heading_{level}", content))
+            elif match.group('n'):
                 # Numbered list
-                blocks.append({
-                    "object": "block",
-                    "type": "numbered_list_item",
-                    "numbered_list_item": {
-                        "rich_text": self._parse_rich_text(line[3:])  # Remove "1. "
-                    }
-                })
+                blocks.append(self._text_block("numbered_list_item", content))
             else:
                 # Regular paragraph
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": self._parse_rich_text(line)
-                    }
-                })
-            
-            i += 1
+                blocks.append(self._text_block("paragraph", content))
         
         return blocks
     
-    def _parse_list_item_with_children(self, lines, start_index):
-        """Parse a list item and its nested children"""
-        line = lines[start_index].strip()
-        
-        # Extract the main list item content
-        if line.startswith('- '):
-            main_content = line[2:]
-        elif line.startswith('* '):
-            main_content = line[2:]
-        else:
-            main_content = line
-        
-        # Create the main list item
-        list_item = {
+    def _text_block(self, block_type, text):
+        """Create a Notion block of the given type containing rich text"""
+        return {
             "object": "block",
-            "type": "bulleted_list_item",
-            "bulleted_list_item": {
-                "rich_text": self._parse_rich_text(main_content)
+            "type": block_type,
+            block_type: {
+                "rich_text": self._parse_rich_text(text)
             }
         }
-        
-        # Look for nested items (children)
-        children = []
-        i = start_index + 1
-        
-        while i < len(lines):
-            next_line = lines[i]
-            
-            # Check if this is a nested item (starts with spaces)
-            if next_line.startswith('    - ') or next_line.startswith('    * '):
-                # Level 2 nesting (4 spaces)
-                child_content = next_line.strip()[2:]  # Remove "- " or "* "
-                children.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": self._parse_rich_text(child_content)
-                    }
-                })
-                i += 1
-            elif next_line.startswith('  - ') or next_line.startswith('  * '):
-                # Level 1 nesting (2 spaces)
-                child_content = next_line.strip()[2:]  # Remove "- " or "* "
-                children.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": self._parse_rich_text(child_content)
-                    }
-                })
-                i += 1
-            elif next_line.strip() == '':
-                # Empty line, continue looking
-                i += 1
-            else:
-                # Not a nested item, stop looking for children
-                break
-        
-        # Add children if any were found
-        if children:
-            list_item["bulleted_list_item"]["children"] = children
-        
-        return list_item, i
     
     def _parse_rich_text(self, text):
         """Parse markdown-style formatting to Notion rich text"""
-        import re
-        
-        # Initialize result array
         rich_text = []
         current_pos = 0
         
-        # Pattern to match bold (**text**) and italic (*text*)
-        patterns = [
-            (r'\*\*([^*]+)\*\*', 'bold'),      # **bold**
-            (r'\*([^*]+)\*', 'italic'),        # *italic*
-            (r'`([^`]+)`', 'code'),            # `code`
-        ]
-        
-        # Find all formatting matches
-        all_matches = []
-        for pattern, format_type in patterns:
-            for match in re.finditer(pattern, text):
-                all_matches.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'content': match.group(1),
-                    'format': format_type,
-                    'full_match': match.group(0)
-                })
-        
-        # Sort matches by start position
-        all_matches.sort(key=lambda x: x['start'])
-        
-        # Process text with formatting
-        for match in all_matches:
+        for match in _RICH_RE.finditer(text):
             # Add plain text before this match
-            if current_pos < match['start']:
-                plain_text = text[current_pos:match['start']]
-                if plain_text:
-                    rich_text.append({
-                        "type": "text",
-                        "text": {"content": plain_text}
-                    })
-            
-            # Add formatted text
-            annotations = {}
-            if match['format'] == 'bold':
-                annotations['bold'] = True
-            elif match['format'] == 'italic':
-                annotations['italic'] = True
-            elif match['format'] == 'code':
-                annotations['code'] = True
+            if current_pos < match.start():
+                rich_text.append({
+                    "type": "text",
+                    "text": {"content": text[current_pos:match.start()]}
+                })
             
+            # Add formatted text, the matched group name is the annotation
             rich_text.append({
                 "type": "text",
-                "text": {"content": match['content']},
-                "annotations": annotations
+                "text": {"content": match.group(match.lastgroup)},
+                "annotations": {match.lastgroup: True}
             })
             
-            current_pos = match['end']
+            current_pos = match.end()
         
         # Add remaining plain text
         if current_pos < len(text):
-            remaining_text = text[current_pos:]
-            if remaining_text:
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": remaining_text}
-                })
+            rich_text.append({
+                "type": "text",
+                "text": {"content": text[current_pos:]}
+            })
         
         # If no formatting found, return simple text
         if not rich_text:
@@ -4,27 +4,125 @@ Handles WebSocket connections and real-time communication
 """
 
 import asyncio
+import heapq
+import itertools
 import websockets
-import json
 import logging
-import threading
+import msgspec
+import orjson
 import time
 import numpy as np
 import io
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 
+class ClientMessage(msgspec.Struct, tag_field="type"):
+    """Text message sent by a client, selected by its "type" field"""
+
+
+class Ping(ClientMessage, tag="ping"):
+    """Keepalive ping"""
+
+
+class GetFullTranscription(ClientMessage, tag="get_full_transcription"):
+    """Request for the full transcription"""
+
+
+class Summarize(ClientMessage, tag="summarize"):
+    """Request to summarize the given text, or the full transcription when empty"""
+    prompt: str = ""
+    text: str = ""
+    regenerate: bool = False  # Ignore a cached summary of the same text
+
+
+class ClearTranscription(ClientMessage, tag="clear_transcription"):
+    """Request to clear the transcription history"""
+
+
+class TranscriptionQueue:
+    """Transcription tasks ordered by queue_id, i.e. by when their audio was received"""
+    
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize  # 0 for unbounded
+        # Heap of (queue_id, task_data). queue_id increases with every chunk received,
+        # unlike the wall clock server_timestamp (which can step back on clock
+        # adjustments), and is unique, so the task dicts are never compared
+        self._heap = []
+        self._not_empty = asyncio.Event()
+    
+    def qsize(self):
+        """Number of tasks waiting"""
+        return len(self._heap)
+    
+    def full(self):
+        """Check if the queue holds maxsize tasks"""
+        return 0 < self.maxsize <= len(self._heap)
+    
+    def put_nowait(self, task_data):
+        """Add a task in O(log n), raising asyncio.QueueFull if the queue is full"""
+        if self.full():
+            raise asyncio.QueueFull
+        heapq.heappush(self._heap, (task_data["queue_id"], task_data))
+        self._not_empty.set()
+    
+    def get_nowait(self):
+        """Remove and return the earliest task, raising asyncio.QueueEmpty if there is none"""
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        _, task_data = heapq.heappop(self._heap)
+        if not self._heap:
+            self._not_empty.clear()
+        return task_data
+    
+    async def get(self):
+        """Wait for a task and return the earliest one"""
+        while not self._heap:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+
 class WebSocketServer:
     """WebSocket server for real-time transcription"""
     
+    # Messages that never change, encoded once instead of on every send
+    _PONG_PAYLOAD = orjson.dumps({"type": "pong"}).decode()
+    _TRANSCRIPTION_CLEARED_PAYLOAD = orjson.dumps({
+        "type": "transcription_cleared",
+        "message": "Transcription history cleared"
+    }).decode()
+    _SUMMARY_PROCESSING_PAYLOAD = orjson.dumps({
+        "type": "summary_processing",
+        "message": "AI summarization in progress..."
+    }).decode()
+    _NOTION_PROCESSING_PAYLOAD = orjson.dumps({
+        "type": "notion_processing",
+        "message": "Saving to Notion..."
+    }).decode()
+    
     def __init__(self, audio_buffer, transcriber, summarizer, notion_client, 
-                 host="localhost", port=8766):
+                 host="localhost", port=8766, send_timeout=5.0, status_flush_delay=0.02,
+                 max_transcription_items=5000, max_message_size=2**22, write_limit=2**20,
+                 ping_interval=10, ping_timeout=10, client_queue_size=256, max_queue_size=10):
         self.host = host
         self.port = port
+        self.send_timeout = send_timeout  # Seconds before a stuck client is dropped
+        
+        # Connection settings passed to websockets.serve
+        self.max_message_size = max_message_size  # Largest accepted incoming message (bytes)
+        self.write_limit = write_limit  # Send buffer high-water mark before send() waits (bytes)
+        self.ping_interval = ping_interval  # Keepalive interval, detects dead clients (seconds)
+        self.ping_timeout = ping_timeout
         self.clients = set()
         
+        # Each client gets an outgoing queue drained by its own sender task, so a
+        # slow client is dropped instead of holding up broadcasts to the others
+        self.client_queue_size = client_queue_size
+        self._outboxes = {}
+        self._sender_tasks = {}
+        
         # Components
         self.audio_buffer = audio_buffer
         self.transcriber = transcriber
@@ -33,25 +131,81 @@ class WebSocketServer:
         
         # Server state
         self.event_loop = None
-        self.full_transcription = []  # Store all transcription content
-        self.transcription_lock = threading.Lock()  # Thread-safe lock
+        # Recent transcriptions as (text, timestamp), oldest dropped past the limit
+        self.full_transcription = deque(maxlen=max_transcription_items)
+        self.transcription_lock = asyncio.Lock()  # All users run on the event loop
+        self._full_text_cache = None  # Joined full_transcription, None when stale
+        self._full_payload_cache = None  # Encoded full_transcription message, None when stale
         
         # Transcription queue management
-        self.transcription_queue = asyncio.Queue()
-        self.processing_count = 0
+        # Ordered by queue_id so results stay chronological even if tasks
+        # are ever queued or completed out of order. Bounded so a backlog cannot
+        # grow without limit when Whisper falls behind (see add_transcription_task)
+        self.transcription_queue = TranscriptionQueue(maxsize=max_queue_size)
+        # Queue state is only touched on the event loop thread, so no lock is needed
         self.currently_processing = False  # Flag to track if currently processing a task
-        self.queue_lock = threading.Lock()
-        self.queue_id_counter = 0
+        self._in_flight = 0  # Tasks taken off the queue and being transcribed now
+        self._queue_id_iter = itertools.count(1)
+        self._worker_task = None
+        # Whisper runs on its own thread so it never waits behind other executor work
+        self._transcribe_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+        
+        # Queue status changes within status_flush_delay are sent as one broadcast
+        self.status_flush_delay = status_flush_delay
+        self._status_dirty = False
+        self._status_flush_handle = None
+        
+        # Fire-and-forget broadcast tasks, referenced until done so they are not collected
+        self._bg_tasks = set()
+        
+        # Text message handlers by message struct type, each called with (websocket, data)
+        self._handlers = {
+            Ping: self._on_ping,
+            GetFullTranscription: self._on_get_full_transcription,
+            Summarize: self._on_summarize,
+            ClearTranscription: self._on_clear_transcription
+        }
+        # Parses and validates text messages in one pass
+        self._decoder = msgspec.json.Decoder(Ping | GetFullTranscription | Summarize | ClearTranscription)
         
     async def register_client(self, websocket):
         """Register client"""
+        outbox = asyncio.Queue(maxsize=self.client_queue_size)
+        self._outboxes[websocket] = outbox
+        self._sender_tasks[websocket] = asyncio.create_task(self._client_sender(websocket, outbox))
         self.clients.add(websocket)
         logger.info(f"Client connected: {websocket.remote_address}")
         
     async def unregister_client(self, websocket):
         """Unregister client"""
-        self.clients.discard(websocket)
+        self._remove_client(websocket)
         logger.info(f"Client disconnected: {websocket.remote_address}")
+    
+    def _remove_client(self, websocket):
+        """Stop broadcasting to a client and cancel its sender task"""
+        self.clients.discard(websocket)
+        self._outboxes.pop(websocket, None)
+        sender_task = self._sender_tasks.pop(websocket, None)
+        if sender_task is not None and sender_task is not asyncio.current_task():
+            sender_task.cancel()
+    
+    def _drop_slow_client(self, websocket):
+        """Disconnect a client that cannot keep up with broadcasts"""
+        logger.warning(f"Dropping slow client: {websocket.remote_address}")
+        self._remove_client(websocket)
+        # Closing ends the client's handler loop, which then unregisters it
+        self._spawn(websocket.close(code=1008, reason="Client too slow"))
+    
+    async def _client_sender(self, websocket, outbox):
+        """Send queued broadcast payloads to one client in order"""
+        try:
+            while True:
+                payload = await outbox.get()
+                await asyncio.wait_for(websocket.send(payload), timeout=self.send_timeout)
+        except websockets.exceptions.ConnectionClosed:
+            self._remove_client(websocket)
+        except asyncio.TimeoutError:
+            self._drop_slow_client(websocket)
         
     async def broadcast_transcription(self, text, server_timestamp=None, queue_id=None):
         """Send transcription result to all clients"""
@@ -61,11 +215,10 @@ class WebSocketServer:
                 server_timestamp = time.time()
             
             # Add to full transcription
-            with self.transcription_lock:
-                self.full_transcription.append({
-                    "text": text,
-                    "timestamp": server_timestamp
-                })
+            async with self.transcription_lock:
+                self.full_transcription.append((text, server_timestamp))
+                self._full_text_cache = None
+                self._full_payload_cache = None
             
             message = {
                 "type": "transcription",
@@ -77,85 +230,117 @@ class WebSocketServer:
             if queue_id is not None:
                 message["queue_id"] = queue_id
             
-            await self.broadcast_message(message)
+            # Queue worker does not wait for slow clients
+            self._spawn(self.broadcast_message(message))
             
         # Task completion processing outside the if block
         if queue_id is not None:
             await self.finish_transcription_task(queue_id)
     
+    @staticmethod
+    def _encode_message(message):
+        """Serialize a message to the JSON text sent over the socket"""
+        # Decoded to str so websockets sends a text frame the client can JSON.parse
+        return orjson.dumps(message).decode()
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background without awaiting it"""
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        return task
+    
     async def broadcast_message(self, message):
         """Send message to all clients"""
+        if self.clients:
+            await self.broadcast_payload(self._encode_message(message))
+    
+    async def broadcast_payload(self, payload):
+        """Send an already serialized message to all clients"""
         if not self.clients:
             return
-            
-        # Remove disconnected clients
-        disconnected = []
-        for client in self.clients:
+        
+        # Same payload object queued for every client without waiting on sends
+        slow_clients = set()
+        for client, outbox in self._outboxes.items():
             try:
-                await client.send(json.dumps(message, ensure_ascii=False))
-            except websockets.exceptions.ConnectionClosed:
-                disconnected.append(client)
+                outbox.put_nowait(payload)
+            except asyncio.QueueFull:
+                slow_clients.add(client)
         
-        for client in disconnected:
-            self.clients.discard(client)
+        for client in slow_clients:
+            self._drop_slow_client(client)
+    
+    async def _get_full_text(self):
+        """Get all transcriptions joined into one text, cached until the next change"""
+        async with self.transcription_lock:
+            if self._full_text_cache is None:
+                self._full_text_cache = " ".join(text for text, _ in self.full_transcription)
+            return self._full_text_cache
     
     async def send_full_transcription(self, websocket):
         """Send full transcription content"""
-        with self.transcription_lock:
-            full_text = " ".join([item["text"] for item in self.full_transcription])
-        
-        message = {
-            "type": "full_transcription",
-            "text": full_text,
-            "count": len(self.full_transcription)
-        }
+        # Repeated requests reuse the encoded message until the transcription changes
+        payload = self._full_payload_cache
+        if payload is None:
+            full_text = await self._get_full_text()
+            
+            message = {
+                "type": "full_transcription",
+                "text": full_text,
+                "count": len(self.full_transcription)
+            }
+            # Encoded right after reading the text, so nothing can change in between
+            payload = self._full_payload_cache = self._encode_message(message)
         
         try:
-            await websocket.send(json.dumps(message, ensure_ascii=False))
+            await websocket.send(payload)
         except websockets.exceptions.ConnectionClosed:
             pass
     
     async def clear_transcription(self):
         """Clear all transcription data"""
-        with self.transcription_lock:
+        async with self.transcription_lock:
             self.full_transcription.clear()
+            self._full_text_cache = None
+            self._full_payload_cache = None
         logger.info("Transcription history cleared")
     
-    async def handle_summarize_request(self, websocket, custom_prompt, client_text):
+    async def handle_summarize_request(self, websocket, custom_prompt, client_text, regenerate=False):
         """Handle summarization request"""
         try:
             # Use client text if provided, otherwise use full transcription
             if client_text and client_text.strip():
                 full_text = client_text
             else:
-                with self.transcription_lock:
-                    full_text = " ".join([item["text"] for item in self.full_transcription])
+                full_text = await self._get_full_text()
             
             if not full_text.strip():
-                await websocket.send(json.dumps({
+                await websocket.send(self._encode_message({
                     "type": "summary_result",
                     "success": False,
                     "message": "No text available for summarization."
-                }, ensure_ascii=False))
+                }))
                 return
             
             # Send processing message
-            await websocket.send(json.dumps({
-                "type": "summary_processing",
-                "message": "AI summarization in progress..."
-            }, ensure_ascii=False))
+            await websocket.send(self._SUMMARY_PROCESSING_PAYLOAD)
             
-            # Generate summary with Gemini AI
-            summary = await self.summarizer.summarize(full_text, custom_prompt)
+            # Generate summary with Gemini AI, forwarding text as it is generated
+            summary_parts = []
+            async for chunk in self.summarizer.summarize_stream(full_text, custom_prompt, regenerate):
+                summary_parts.append(chunk)
+                await websocket.send(self._encode_message({
+                    "type": "summary_chunk",
+                    "text": chunk
+                }))
+            summary = "".join(summary_parts)
             
             # Save to Notion if configured
             notion_result = None
             if self.notion_client.is_available():
                 try:
-                    await websocket.send(json.dumps({
-                        "type": "notion_processing",
-                        "message": "Saving to Notion..."
-                    }, ensure_ascii=False))
+                    await websocket.send(self._NOTION_PROCESSING_PAYLOAD)
                     
                     notion_result = await self.notion_client.save_summary(summary)
                     
@@ -171,21 +356,22 @@ class WebSocketServer:
                 "notion_result": notion_result
             }
             
-            await websocket.send(json.dumps(response, ensure_ascii=False))
+            await websocket.send(self._encode_message(response))
             
         except Exception as e:
             logger.error(f"Summarization error: {e}")
-            await websocket.send(json.dumps({
+            await websocket.send(self._encode_message({
                 "type": "summary_result",
                 "success": False,
                 "message": str(e)
-            }, ensure_ascii=False))
+            }))
     
     async def handle_audio_data(self, data):
         """Process received audio data"""
         try:
-            # Convert binary data to numpy array
-            audio_data = np.frombuffer(data, dtype=np.float32)
+            # View the frame bytes as float32 without copying; AudioBuffer
+            # copies the samples into its own buffer and does not keep the view
+            audio_data = np.frombuffer(data, dtype=np.float32, count=len(data) // 4)
             
             # Add to audio buffer and detect silence
             audio_chunk = self.audio_buffer.add_audio(audio_data)
@@ -197,27 +383,42 @@ class WebSocketServer:
                 logger.info(f"Processing audio chunk... Length: {len(audio_chunk)/16000:.2f}s")
                 
                 # Add transcription task to queue
-                with self.queue_lock:
-                    self.queue_id_counter += 1
-                    queue_id = self.queue_id_counter
+                queue_id = next(self._queue_id_iter)
                 
                 # Add transcription task to queue
                 await self.add_transcription_task(audio_chunk, server_timestamp, queue_id)
                 
-                # Notify clients of queue status (queue size will be calculated in broadcast_queue_status)
-                await self.broadcast_queue_status()
+                # Notify clients of queue status (queue size will be calculated when flushed)
+                self._mark_status_dirty()
                 
         except Exception as e:
             logger.error(f"Audio data processing error: {e}")
     
     async def add_transcription_task(self, audio_chunk, server_timestamp, queue_id):
-        """Add transcription task to queue"""
+        """
+        Add transcription task to queue
+        
+        When the queue is full the oldest waiting chunk is dropped to make room,
+        so live transcription stays current instead of falling further behind,
+        and clients are sent a queue_overflow message naming the dropped task.
+        """
         task_data = {
             "audio_chunk": audio_chunk,
             "server_timestamp": server_timestamp,
             "queue_id": queue_id
         }
-        await self.transcription_queue.put(task_data)
+        try:
+            self.transcription_queue.put_nowait(task_data)
+        except asyncio.QueueFull:
+            dropped = self.transcription_queue.get_nowait()
+            self.transcription_queue.put_nowait(task_data)
+            logger.warning(f"Transcription queue full, dropped oldest task: ID={dropped['queue_id']}")
+            self._spawn(self.broadcast_message({
+                "type": "queue_overflow",
+                "dropped_queue_id": dropped["queue_id"],
+                "dropped_server_timestamp": dropped["server_timestamp"],
+                "message": "Transcription is falling behind, oldest audio was skipped"
+            }))
         logger.info(f"Task added to queue: ID={queue_id}")
 
     async def finish_transcription_task(self, queue_id):
@@ -227,13 +428,31 @@ class WebSocketServer:
         
         # Queue status is updated in queue_worker after processing completes
     
+    def _mark_status_dirty(self):
+        """Schedule a queue status broadcast, coalescing changes made in quick succession"""
+        self._status_dirty = True
+        if self._status_flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._status_flush_handle = loop.call_later(self.status_flush_delay, self._start_status_flush)
+    
+    def _start_status_flush(self):
+        """Timer callback that runs the pending queue status broadcast"""
+        self._status_flush_handle = None
+        if self._status_dirty:
+            self._spawn(self.broadcast_queue_status())
+    
     async def broadcast_queue_status(self):
-        """Notify clients of queue status"""
-        with self.queue_lock:
-            # Calculate total: pending tasks in queue + currently processing task (if any)
-            pending_tasks = self.transcription_queue.qsize()
-            total_tasks = pending_tasks + (1 if self.currently_processing else 0)
-            
+        """Notify clients of the current queue status immediately"""
+        # Sending now supersedes any scheduled flush
+        self._status_dirty = False
+        if self._status_flush_handle is not None:
+            self._status_flush_handle.cancel()
+            self._status_flush_handle = None
+        
+        # Calculate total: pending tasks in queue + tasks of the batch being transcribed
+        pending_tasks = self.transcription_queue.qsize()
+        total_tasks = pending_tasks + self._in_flight
+        
         message = {
             "type": "queue_status",
             "processing_count": total_tasks,
@@ -249,33 +468,21 @@ class WebSocketServer:
         
         try:
             async for message in websocket:
-                if isinstance(message, bytes):
-                    # Process binary data (audio)
+                # Binary audio frames are nearly all traffic, so check them first
+                if type(message) is bytes:
                     await self.handle_audio_data(message)
-                else:
-                    # Process text messages
-                    try:
-                        data = json.loads(message)
-                        message_type = data.get("type")
-                        
-                        if message_type == "ping":
-                            await websocket.send(json.dumps({"type": "pong"}))
-                        elif message_type == "get_full_transcription":
-                            await self.send_full_transcription(websocket)
-                        elif message_type == "summarize":
-                            custom_prompt = data.get("prompt", "")
-                            client_text = data.get("text", "")
-                            await self.handle_summarize_request(websocket, custom_prompt, client_text)
-                        elif message_type == "clear_transcription":
-                            await self.clear_transcription()
-                            await self.broadcast_message({
-                                "type": "transcription_cleared",
-                                "message": "Transcription history cleared"
-                            })
-                            
-                    except json.JSONDecodeError:
-                        logger.warning("Invalid JSON message received")
-                        
+                    continue
+                
+                # Process text messages
+                try:
+                    data = self._decoder.decode(message)
+                except msgspec.DecodeError as e:
+                    # Malformed JSON, unknown type or fields of the wrong type
+                    logger.warning(f"Invalid message received: {e}")
+                    continue
+                
+                await self._handlers[type(data)](websocket, data)
+                
         except websockets.exceptions.ConnectionClosed:
             logger.info("Client connection closed")
         except Exception as e:
@@ -283,6 +490,23 @@ class WebSocketServer:
         finally:
             await self.unregister_client(websocket)
     
+    async def _on_ping(self, websocket, data):
+        """Reply to a keepalive ping"""
+        await websocket.send(self._PONG_PAYLOAD)
+    
+    async def _on_get_full_transcription(self, websocket, data):
+        """Send the full transcription to the requesting client"""
+        await self.send_full_transcription(websocket)
+    
+    async def _on_summarize(self, websocket, data):
+        """Summarize the given text, or the full transcription"""
+        await self.handle_summarize_request(websocket, data.prompt, data.text, data.regenerate)
+    
+    async def _on_clear_transcription(self, websocket, data):
+        """Clear the transcription and notify all clients"""
+        await self.clear_transcription()
+        await self.broadcast_payload(self._TRANSCRIPTION_CLEARED_PAYLOAD)
+    
     async def start_server(self):
         """Start server"""
         logger.info(f"Starting WebSocket server: ws://{self.host}:{self.port}")
@@ -291,60 +515,113 @@ class WebSocketServer:
         self.event_loop = asyncio.get_running_loop()
         
         # Start queue processing worker
-        asyncio.create_task(self.queue_worker())
+        self._worker_task = asyncio.create_task(self.queue_worker())
         
-        async with websockets.serve(self.handle_client, self.host, self.port):
-            logger.info("Server started. Press Ctrl+C to stop.")
-            # Run server forever
-            await asyncio.Future()  # run forever
+        try:
+            # permessage-deflate shrinks the JSON text messages; it is negotiated per
+            # connection, so incoming binary audio frames are covered by it as well
+            async with websockets.serve(
+                self.handle_client,
+                self.host,
+                self.port,
+                compression="deflate",
+                max_size=self.max_message_size,
+                write_limit=self.write_limit,
+                ping_interval=self.ping_interval,
+                ping_timeout=self.ping_timeout
+            ):
+                logger.info("Server started. Press Ctrl+C to stop.")
+                # Run server forever
+                await asyncio.Future()  # run forever
+        finally:
+            await self.stop()
+    
+    async def stop(self):
+        """Stop background tasks and release worker threads and connections"""
+        if self._status_flush_handle is not None:
+            self._status_flush_handle.cancel()
+            self._status_flush_handle = None
+        
+        tasks = [*self._bg_tasks, *self._sender_tasks.values()]
+        if self._worker_task is not None:
+            tasks.append(self._worker_task)
+            self._worker_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Do not wait for an in-flight transcription; queued ones are dropped
+        self._transcribe_pool.shutdown(wait=False, cancel_futures=True)
+        self.transcriber.close()
+        await self.summarizer.close()
+        await self.notion_client.close()
+        logger.info("Server stopped")
+    
+    def _take_queued_tasks(self, limit):
+        """Take up to limit tasks that are already waiting, without blocking"""
+        tasks = []
+        while len(tasks) < limit:
+            try:
+                tasks.append(self.transcription_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return tasks
+    
+    async def process_transcription_batch(self, batch):
+        """Transcribe a batch of queued tasks and broadcast the results in order"""
+        queue_ids = [task_data["queue_id"] for task_data in batch]
+        logger.info(f"Processing tasks: IDs={queue_ids}")
+        
+        try:
+            # Transcribe audio on the dedicated Whisper thread but wait for completion
+            texts = await asyncio.get_running_loop().run_in_executor(
+                self._transcribe_pool, self.transcriber.transcribe_batch,
+                [task_data["audio_chunk"] for task_data in batch]
+            )
+            
+            for task_data, text in zip(batch, texts):
+                if text and text.strip():
+                    logger.info(f"Transcription result: {text}")
+                    # Broadcast transcription result
+                    await self.broadcast_transcription(text, task_data["server_timestamp"], task_data["queue_id"])
+                else:
+                    logger.info(f"Empty transcription for task ID={task_data['queue_id']}")
+                
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
     
     async def queue_worker(self):
         """Queue processing worker (sequential processing to maintain order)"""
         logger.info("Queue worker started")
+        batch_size = self.transcriber.batch_size
         while True:
             try:
                 # Wait for next task from queue
-                task_data = await self.transcription_queue.get()
-                logger.info(f"Processing task: ID={task_data['queue_id']}")
-                
-                # Mark as currently processing
-                with self.queue_lock:
-                    self.currently_processing = True
+                batch = [await self.transcription_queue.get()]
                 
-                # Notify clients of updated queue status
-                await self.broadcast_queue_status()
+                # Mark as currently processing and notify clients once per burst
+                self.currently_processing = True
+                self._mark_status_dirty()
                 
-                # Process transcription synchronously to maintain order
-                try:
-                    # Transcribe audio on separate thread but wait for completion
-                    text = await asyncio.get_event_loop().run_in_executor(
-                        None, self.transcriber.transcribe, task_data["audio_chunk"]
-                    )
-                    
-                    if text and text.strip():
-                        logger.info(f"Transcription result: {text}")
-                        # Broadcast transcription result
-                        await self.broadcast_transcription(text, task_data["server_timestamp"], task_data["queue_id"])
-                    else:
-                        logger.info(f"Empty transcription for task ID={task_data['queue_id']}")
-                        
-                except Exception as e:
-                    logger.error(f"Transcription error: {e}")
+                # Keep draining tasks that queued up meanwhile, in batches, until
+                # the queue is empty (order is preserved by processing sequentially)
+                batch += self._take_queued_tasks(batch_size - 1)
+                while batch:
+                    # Tasks leave the queue here, so count them as in flight instead
+                    self._in_flight = len(batch)
+                    await self.process_transcription_batch(batch)
+                    batch = self._take_queued_tasks(batch_size)
+                    self._mark_status_dirty()
                 
                 # Mark as no longer processing and update queue status
-                with self.queue_lock:
-                    self.currently_processing = False
-                
-                # Notify clients of updated queue status
-                await self.broadcast_queue_status()
-                
-                # Mark task as done
-                self.transcription_queue.task_done()
+                self.currently_processing = False
+                self._in_flight = 0
+                self._mark_status_dirty()
                 
             except Exception as e:
                 logger.error(f"Queue worker error: {e}")
                 # Ensure processing flag is reset on error
-                with self.queue_lock:
-                    self.currently_processing = False
-                await self.broadcast_queue_status()
+                self.currently_processing = False
+                self._in_flight = 0
+                self._spawn(self.broadcast_queue_status())
                 await asyncio.sleep(1)  # Wait on error
@@ -6,6 +6,7 @@ class ChromeAudioTranscriber {
     this.processor = null;
     this.isRecording = false;
     this.fullText = "";
+    this.lastSummaryRequest = null;
 
     this.initWebSocket();
     this.initUI();
@@ -42,12 +43,18 @@ class ChromeAudioTranscriber {
             case "summary_processing":
               this.showSummaryProcessing(data.message);
               break;
+            case "summary_chunk":
+              this.appendSummaryChunk(data.text);
+              break;
             case "summary_result":
               this.displaySummaryResult(data);
               break;
             case "transcription_cleared":
               this.handleTranscriptionCleared(data.message);
               break;
+            case "queue_overflow":
+              console.warn(data.message, data.dropped_queue_id);
+              break;
             default:
               console.log("Unhandled message type:", data.type);
           }
@@ -251,11 +258,17 @@ class ChromeAudioTranscriber {
       summaryBtn.disabled = true;
       summaryBtn.textContent = "🤖 Processing...";
 
+      // Asking again for the same text and prompt means the user wants a new summary
+      const request = customPrompt + "\0" + this.fullText;
+      const regenerate = request === this.lastSummaryRequest;
+      this.lastSummaryRequest = request;
+
       this.ws.send(
         JSON.stringify({
           type: "summarize",
           prompt: customPrompt,
           text: this.fullText,
+          regenerate: regenerate,
         })
       );
     } else {
@@ -269,9 +282,22 @@ class ChromeAudioTranscriber {
 
     summaryContent.textContent = message;
     summaryArea.style.display = "block";
+    this.summaryStreaming = false;
+  }
+
+  appendSummaryChunk(text) {
+    const summaryContent = document.getElementById("summaryContent");
+
+    // Replace the processing message with the first chunk
+    if (!this.summaryStreaming) {
+      summaryContent.textContent = "";
+      this.summaryStreaming = true;
+    }
+    summaryContent.textContent += text;
   }
 
   displaySummaryResult(data) {
+    this.summaryStreaming = false;
     const summaryBtn = document.getElementById("summaryBtn");
     summaryBtn.disabled = false;
     summaryBtn.textContent = "🤖 AI Summary";
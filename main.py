@@ -9,6 +9,11 @@ import sys
 import os
 from dotenv import load_dotenv
 
+try:
+    import uvloop  # Faster event loop (Linux/macOS only, not available on Windows)
+except ImportError:
+    uvloop = None
+
 # Add backend directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
@@ -49,7 +54,8 @@ def main():
             silence_threshold=SILENCE_THRESHOLD,
             silence_duration=SILENCE_DURATION,
             min_audio_level=MIN_AUDIO_LEVEL,
-            max_audio_chunk_duration=MAX_AUDIO_CHUNK_DURATION
+            max_audio_chunk_duration=MAX_AUDIO_CHUNK_DURATION,
+            vad_aggressiveness=VAD_AGGRESSIVENESS
         )
         
         transcriber = WhisperTranscriber(
@@ -57,11 +63,24 @@ def main():
             min_text_length=MIN_TEXT_LENGTH,
             max_text_length=MAX_TEXT_LENGTH,
             max_repetition_chars=MAX_REPETITION_CHARS,
-            max_repetition_words=MAX_REPETITION_WORDS
+            max_repetition_words=MAX_REPETITION_WORDS,
+            batch_size=TRANSCRIPTION_BATCH_SIZE,
+            beam_size=WHISPER_BEAM_SIZE,
+            device=WHISPER_DEVICE,
+            compute_type=WHISPER_COMPUTE_TYPE,
+            cpu_threads=WHISPER_CPU_THREADS,
+            num_workers=WHISPER_NUM_WORKERS,
+            draft_model_size=WHISPER_DRAFT_MODEL_SIZE,
+            draft_logprob_threshold=WHISPER_DRAFT_LOGPROB_THRESHOLD
         )
         
         # AI integration
-        summarizer = GeminiSummarizer(api_key=GEMINI_API_KEY)
+        summarizer = GeminiSummarizer(
+            api_key=GEMINI_API_KEY,
+            cache_dir=SUMMARY_CACHE_DIR,
+            summary_cache_ttl=SUMMARY_CACHE_TTL,
+            semantic_threshold=SUMMARY_SEMANTIC_CACHE_THRESHOLD
+        )
         
         # Notion integration
         notion_client = NotionClient(
@@ -76,13 +95,26 @@ def main():
             summarizer=summarizer,
             notion_client=notion_client,
             host=WEBSOCKET_HOST,
-            port=WEBSOCKET_PORT
+            port=WEBSOCKET_PORT,
+            send_timeout=WEBSOCKET_SEND_TIMEOUT,
+            status_flush_delay=QUEUE_STATUS_FLUSH_DELAY,
+            max_transcription_items=MAX_TRANSCRIPTION_ITEMS,
+            max_message_size=WEBSOCKET_MAX_MESSAGE_SIZE,
+            write_limit=WEBSOCKET_WRITE_LIMIT,
+            ping_interval=WEBSOCKET_PING_INTERVAL,
+            ping_timeout=WEBSOCKET_PING_TIMEOUT,
+            client_queue_size=WEBSOCKET_CLIENT_QUEUE_SIZE,
+            max_queue_size=MAX_QUEUE_SIZE
         )
         
         logger.info("All components initialized successfully")
         
         # Start server
-        asyncio.run(server.start_server())
+        if uvloop is not None:
+            logger.info("Using uvloop event loop")
+            uvloop.run(server.start_server())
+        else:
+            asyncio.run(server.start_server())
         
     except KeyboardInterrupt:
         logger.info("Stopping server...")